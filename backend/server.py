@@ -1,15 +1,26 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 import os
 import logging
 import httpx
 import asyncio
-from datetime import datetime, timedelta
+import brotli
+import gzip
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+import math
+import re
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 
 ROOT_DIR = Path(__file__).parent
@@ -28,14 +39,126 @@ api_router = APIRouter(prefix="/api")
 
 # Calgary API Configuration
 CALGARY_API_URL = "https://data.calgary.ca/resource/c2es-76ed.json"
-CACHE_DURATION = timedelta(hours=1)  # Cache for 1 hour
+CACHE_DURATION = timedelta(hours=1)  # Default refresh interval per source
+SOURCE_RETRY_BASE = timedelta(minutes=1)  # First retry delay after a failed refresh, doubled per failure
+MAX_BATCH_SIZE = 1000  # Max permit numbers per batch lookup
 
-# Global cache
-permits_cache = {
-    "data": None,
-    "last_updated": None
+# Live update stream configuration
+STREAM_KEEPALIVE_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 20  # Pending updates kept per subscriber before dropping the oldest
+
+# Response compression configuration
+COMPRESSION_MIN_SIZE = 1024  # Smaller bodies are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Per-request compression
+BROTLI_CACHED_QUALITY = 9  # Compressed once per cache version, so spend more CPU for smaller bytes
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Stored response bodies across all encodings
+CACHEABLE_PERMIT_PARAMS = {"limit", "offset", "source"}  # Only unfiltered permit pages are stored
+
+# Normalised permit record, every source is mapped onto these fields
+PERMIT_FIELDS = [
+    "permitnum", "statuscurrent", "applieddate", "issueddate", "completeddate",
+    "permittype", "permittypemapped", "permitclass", "permitclassgroup", "permitclassmapped",
+    "workclass", "workclassgroup", "workclassmapped", "description", "applicantname",
+    "contractorname", "housingunits", "estprojectcost", "totalsqft", "originaladdress",
+    "communitycode", "communityname", "latitude", "longitude"
+]
+PERMIT_FIELD_DEFAULTS = {
+    "statuscurrent": "Unknown",
+    "issueddate": None,
+    "completeddate": None,
+    "housingunits": "0",
+    "estprojectcost": "0",
+    "totalsqft": None,
+    "latitude": None,
+    "longitude": None
+}  # Any other missing field defaults to ""
+
+# Permit data sources. field_map maps a permit field to the source's own field
+# name where they differ; each source is cached and refreshed independently.
+PERMIT_SOURCES = {
+    "calgary": {
+        "name": "Calgary Open Data API",
+        "url": CALGARY_API_URL,
+        "params": {"$limit": 2000, "$order": "applieddate DESC"},
+        "field_map": {},
+        "refresh_interval": CACHE_DURATION
+    }
+}
+
+# Full-text search configuration
+SEARCH_FIELDS = ["description", "originaladdress", "applicantname", "contractorname"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Status check storage configuration
+STATUS_CHECK_RETENTION = timedelta(days=int(os.environ.get('STATUS_CHECK_RETENTION_DAYS', 30)))
+STATUS_FLUSH_SIZE = 500  # Buffered status checks that trigger an immediate flush
+STATUS_FLUSH_INTERVAL = 2.0  # Seconds between background flushes
+STATUS_FLUSH_MAX_BACKOFF = 60.0  # Longest wait between flushes while MongoDB keeps failing
+STATUS_MAX_BUFFER = 50_000  # Buffered checks kept while MongoDB is unavailable
+STATUS_PAGE_SIZE = 100
+STATUS_MAX_PAGE_SIZE = 1000
+
+# Saved search alert configuration
+COST_BUCKET_BOUNDS = [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000, 10_000_000]
+MAX_ALERTS_PER_REQUEST = 500
+SEARCH_ALERT_RETENTION = timedelta(days=int(os.environ.get('SEARCH_ALERT_RETENTION_DAYS', 90)))
+
+# Historical archive, one Parquet file per month of applieddate
+ARCHIVE_DIR = Path(os.environ.get('ARCHIVE_DIR', ROOT_DIR / 'archive'))
+ARCHIVE_BATCH_SIZE = 5000  # Rows held in memory at a time when scanning partitions
+ARCHIVE_FIELDS = PERMIT_FIELDS + ["source"]
+ARCHIVE_SCHEMA = pa.schema([(field, pa.string()) for field in ARCHIVE_FIELDS])
+archive_lock = asyncio.Lock()
+archive_tasks = set()  # Pending background archive writes
+
+def new_permits_cache() -> dict:
+    """Create an empty permits snapshot"""
+    return {
+        "data": None,
+        "last_updated": None,
+        "search_index": None,
+        "permit_index": None,
+        "oldest_applied": None,
+        "last_attempt": None,
+        "last_error": None,
+        "failures": 0
+    }
+
+# Per-source caches, each refreshed under its own lock
+source_caches = {source_id: new_permits_cache() for source_id in PERMIT_SOURCES}
+source_locks = {source_id: asyncio.Lock() for source_id in PERMIT_SOURCES}
+source_refresh_tasks = {}
+
+# Global cache, merged across all sources
+permits_cache = new_permits_cache()
+
+# In-memory index over saved searches, keyed by the fields they constrain.
+# None holds searches that don't constrain that field.
+saved_search_index = {
+    "searches": {},
+    "status": {},
+    "workclass": {},
+    "community": {},
+    "cost_buckets": [set() for _ in range(len(COST_BUCKET_BOUNDS) + 1)],
+    "community_matches": {}  # communityname -> search ids whose community is a substring of it
 }
 
+# Encoded response bodies derived from a cache snapshot, least recently used first.
+# Each entry is {"version": cache last_updated, "bodies": {encoding: (bytes, applied encoding)}, "size": bytes}.
+response_cache = OrderedDict()
+
+# Status checks waiting to be written with insert_many
+status_check_buffer = []
+status_flush_lock = asyncio.Lock()
+status_flush_requested = asyncio.Event()
+
+# Live update subscribers, each a {"queue": asyncio.Queue, "filters": PermitFilter, "terms": query terms,
+# "filter_key": hashable form of the filters}
+permit_subscribers = []
+
 # Models
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -45,7 +168,36 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class PermitBatchRequest(BaseModel):
+    permit_numbers: List[str]
+    source: Optional[str] = None
+
+class SavedSearchCreate(BaseModel):
+    name: str
+    owner: Optional[str] = None
+    source: Optional[str] = None
+    permit_type: Optional[str] = None
+    status: Optional[str] = None
+    min_cost: Optional[float] = None
+    max_cost: Optional[float] = None
+    community: Optional[str] = None
+    work_class: Optional[str] = None
+    q: Optional[str] = None
+
+class SavedSearch(SavedSearchCreate):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SearchAlert(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    search_id: str
+    owner: Optional[str] = None
+    change: str  # 'added' or 'status_changed'
+    permit: dict
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class PermitFilter(BaseModel):
+    source: Optional[str] = None
     permit_type: Optional[str] = None
     status: Optional[str] = None
     min_cost: Optional[float] = None
@@ -54,15 +206,20 @@ class PermitFilter(BaseModel):
     date_range: Optional[str] = 'all'  # 'all', '7days', '30days', '90days'
     work_class: Optional[str] = None
     contractor_type: Optional[str] = 'all'
+    q: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
     limit: Optional[int] = 1000
     offset: Optional[int] = 0
 
-async def fetch_calgary_permits():
-    """Fetch permits from Calgary API with error handling"""
+async def fetch_source_permits(source_id: str):
+    """Fetch permits from a source API with error handling"""
+    source = PERMIT_SOURCES[source_id]
+    field_map = source["field_map"]
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
             # Fetch with a reasonable limit to avoid timeouts
-            response = await client.get(f"{CALGARY_API_URL}?$limit=2000&$order=applieddate DESC")
+            response = await client.get(source["url"], params=source["params"])
             response.raise_for_status()
             data = response.json()
             
@@ -70,33 +227,12 @@ async def fetch_calgary_permits():
             cleaned_data = []
             for permit in data:
                 try:
-                    # Ensure required fields exist
+                    # Map the source's fields onto the permit record, filling in defaults
                     permit_data = {
-                        "permitnum": permit.get("permitnum", ""),
-                        "statuscurrent": permit.get("statuscurrent", "Unknown"),
-                        "applieddate": permit.get("applieddate", ""),
-                        "issueddate": permit.get("issueddate"),
-                        "completeddate": permit.get("completeddate"),
-                        "permittype": permit.get("permittype", ""),
-                        "permittypemapped": permit.get("permittypemapped", ""),
-                        "permitclass": permit.get("permitclass", ""),
-                        "permitclassgroup": permit.get("permitclassgroup", ""),
-                        "permitclassmapped": permit.get("permitclassmapped", ""),
-                        "workclass": permit.get("workclass", ""),
-                        "workclassgroup": permit.get("workclassgroup", ""),
-                        "workclassmapped": permit.get("workclassmapped", ""),
-                        "description": permit.get("description", ""),
-                        "applicantname": permit.get("applicantname", ""),
-                        "contractorname": permit.get("contractorname", ""),
-                        "housingunits": permit.get("housingunits", "0"),
-                        "estprojectcost": permit.get("estprojectcost", "0"),
-                        "totalsqft": permit.get("totalsqft"),
-                        "originaladdress": permit.get("originaladdress", ""),
-                        "communitycode": permit.get("communitycode", ""),
-                        "communityname": permit.get("communityname", ""),
-                        "latitude": permit.get("latitude"),
-                        "longitude": permit.get("longitude")
+                        field: permit.get(field_map.get(field, field), PERMIT_FIELD_DEFAULTS.get(field, ""))
+                        for field in PERMIT_FIELDS
                     }
+                    permit_data["source"] = source_id
                     
                     # Only include permits with valid coordinates
                     if permit_data["latitude"] and permit_data["longitude"]:
@@ -106,72 +242,301 @@ async def fetch_calgary_permits():
                     logging.warning(f"Error processing permit {permit.get('permitnum', 'unknown')}: {e}")
                     continue
             
-            logging.info(f"Successfully fetched {len(cleaned_data)} permits from Calgary API")
+            logging.info(f"Successfully fetched {len(cleaned_data)} permits from {source['name']}")
             return cleaned_data
             
     except httpx.TimeoutException:
-        logging.error("Timeout when fetching Calgary permits")
-        raise HTTPException(status_code=503, detail="Calgary API timeout")
+        logging.error(f"Timeout when fetching {source_id} permits")
+        raise HTTPException(status_code=503, detail=f"{source['name']} timeout")
     except httpx.HTTPError as e:
-        logging.error(f"HTTP error when fetching Calgary permits: {e}")
-        raise HTTPException(status_code=502, detail="Calgary API error")
+        logging.error(f"HTTP error when fetching {source_id} permits: {e}")
+        raise HTTPException(status_code=502, detail=f"{source['name']} error")
     except Exception as e:
-        logging.error(f"Unexpected error when fetching Calgary permits: {e}")
+        logging.error(f"Unexpected error when fetching {source_id} permits: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase alphanumeric search terms"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def permit_terms(permit: dict) -> set:
+    """Get the distinct search terms of a permit"""
+    return {term for field in SEARCH_FIELDS for term in tokenize(permit.get(field))}
+
+def build_search_index(permits: List[dict]) -> dict:
+    """Build an inverted index with term frequencies over the searchable permit fields"""
+    postings = {}
+    doc_lengths = []
+    
+    for doc_id, permit in enumerate(permits):
+        terms = []
+        for field in SEARCH_FIELDS:
+            terms.extend(tokenize(permit.get(field)))
+        
+        doc_lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            postings.setdefault(term, []).append((doc_id, tf))
+    
+    total_length = sum(doc_lengths)
+    return {
+        "postings": postings,
+        "doc_lengths": doc_lengths,
+        "avg_doc_length": total_length / len(doc_lengths) if doc_lengths else 0,
+        "doc_count": len(doc_lengths)
+    }
+
+def search_permits(query: str, index: dict) -> List[int]:
+    """Rank permit positions matching the query terms by BM25 score"""
+    doc_count = index["doc_count"]
+    avg_doc_length = index["avg_doc_length"] or 1
+    doc_lengths = index["doc_lengths"]
+    scores = {}
+    
+    for term in set(tokenize(query)):
+        term_postings = index["postings"].get(term)
+        if not term_postings:
+            continue
+        
+        df = len(term_postings)
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for doc_id, tf in term_postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[doc_id] / avg_doc_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    
+    # Highest score first, ties keep the original (most recent first) order
+    return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+
+def compute_permit_changes(previous_index: dict, permits: List[dict]) -> dict:
+    """Find permits that are new or changed status since the previous snapshot"""
+    added = []
+    status_changed = []
+    for permit in permits:
+        previous = previous_index.get(permit.get("permitnum"))
+        if previous is None:
+            added.append(permit)
+        elif previous.get("statuscurrent") != permit.get("statuscurrent"):
+            status_changed.append({**permit, "previous_status": previous.get("statuscurrent")})
+    
+    return {"added": added, "status_changed": status_changed}
+
+def publish_permit_changes(changes: dict):
+    """Push the permits matching each subscriber's filters onto its queue"""
+    # Tokenise the delta once, subscribers with a query only need term overlap, not ranking
+    change_types = ["added", "status_changed"]
+    delta_terms = {}
+    if any(subscriber["terms"] for subscriber in permit_subscribers):
+        delta_terms = {change: [permit_terms(p) for p in changes[change]] for change in change_types}
+    
+    # Subscribers with identical filters share one event
+    events = {}
+    for subscriber in permit_subscribers:
+        event = events.get(subscriber["filter_key"])
+        if event is None:
+            filters = subscriber["filters"]
+            terms = subscriber["terms"]
+            event = {"cache_updated": permits_cache["last_updated"].isoformat()}
+            for change in change_types:
+                event[change] = [
+                    permit for i, permit in enumerate(changes[change])
+                    if permit_matches(permit, filters) and (not terms or terms & delta_terms[change][i])
+                ]
+            # Status changes that move a previously matching permit out of the filters
+            event["removed"] = [
+                permit["permitnum"] for i, permit in enumerate(changes["status_changed"])
+                if not permit_matches(permit, filters)
+                and permit_matches({**permit, "statuscurrent": permit["previous_status"]}, filters)
+                and (not terms or terms & delta_terms["status_changed"][i])
+            ]
+            events[subscriber["filter_key"]] = event
+        if not event["added"] and not event["status_changed"] and not event["removed"]:
+            continue
+        
+        queue = subscriber["queue"]
+        if queue.full():
+            # Slow consumer, drop its oldest pending update
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+def index_permits(cache: dict, permits_data: List[dict]):
+    """Store a permits snapshot in a cache along with its derived indexes"""
+    cache["data"] = permits_data
+    cache["search_index"] = build_search_index(permits_data)
+    cache["oldest_applied"] = min((p["applieddate"][:10] for p in permits_data if p.get("applieddate")), default=None)
+    cache["last_updated"] = datetime.utcnow()
+
+def rebuild_merged_cache():
+    """Merge every loaded source snapshot into the global cache, most recently applied first"""
+    loaded = [cache for cache in source_caches.values() if cache["data"] is not None]
+    if len(loaded) == 1:
+        # Permit number lookups always go through the per-source indexes
+        for key in ["data", "search_index", "oldest_applied", "last_updated"]:
+            permits_cache[key] = loaded[0][key]
+        return
+    
+    merged = sorted((p for cache in loaded for p in cache["data"]),
+                    key=lambda p: p.get("applieddate") or "", reverse=True)
+    index_permits(permits_cache, merged)
+    # Memory only covers every source from the newest of their oldest days, earlier ranges go to the archive
+    permits_cache["oldest_applied"] = max((cache["oldest_applied"] for cache in loaded if cache["oldest_applied"]), default=None)
+
+async def update_source_cache(source_id: str, permits_data: List[dict]):
+    """Store a fresh snapshot for one source and propagate its changes"""
+    cache = source_caches[source_id]
+    previous_index = cache["permit_index"]
+    
+    index_permits(cache, permits_data)
+    cache["permit_index"] = {p["permitnum"]: p for p in permits_data if p.get("permitnum")}
+    rebuild_merged_cache()
+    
+    # Append the snapshot to the historical archive without holding up the refresh
+    task = asyncio.create_task(archive_snapshot(source_id, permits_data))
+    archive_tasks.add(task)
+    task.add_done_callback(archive_tasks.discard)
+    
+    # Nothing to diff against on the first load
+    if previous_index is None:
+        return
+    
+    changes = compute_permit_changes(previous_index, permits_data)
+    if not changes["added"] and not changes["status_changed"]:
+        return
+    
+    if permit_subscribers:
+        logging.info(f"Publishing {len(changes['added'])} new and {len(changes['status_changed'])} changed "
+                     f"{source_id} permits to {len(permit_subscribers)} subscribers")
+        publish_permit_changes(changes)
+    
+    if saved_search_index["searches"]:
+        await emit_saved_search_alerts(changes)
+
+def source_refresh_delay(source_id: str) -> float:
+    """Seconds until a source is due for a refresh, backing off after failed attempts"""
+    cache = source_caches[source_id]
+    interval = PERMIT_SOURCES[source_id]["refresh_interval"]
+    if cache["failures"]:
+        retry_delay = SOURCE_RETRY_BASE * 2 ** min(cache["failures"] - 1, 10)
+        due = cache["last_attempt"] + min(retry_delay, interval)
+    elif cache["last_updated"] is not None:
+        due = cache["last_updated"] + interval
+    else:
+        return 0.0
+    
+    return max(0.0, (due - datetime.utcnow()).total_seconds())
+
+async def refresh_source(source_id: str, force: bool = True) -> List[dict]:
+    """Fetch and store a source's permits, one refresh per source at a time"""
+    cache = source_caches[source_id]
+    async with source_locks[source_id]:
+        # Another request may have refreshed it while we waited
+        if not force and source_refresh_delay(source_id) > 0:
+            return cache["data"]
+        
+        cache["last_attempt"] = datetime.utcnow()
+        try:
+            permits_data = await fetch_source_permits(source_id)
+        except Exception as e:
+            cache["failures"] += 1
+            cache["last_error"] = str(e)
+            raise
+        
+        cache["failures"] = 0
+        cache["last_error"] = None
+        await update_source_cache(source_id, permits_data)
+        return permits_data
+
+async def refresh_sources(source_ids: List[str], force: bool = True) -> dict:
+    """Refresh several sources concurrently, returning the error for each source that failed"""
+    results = await asyncio.gather(*(refresh_source(source_id, force) for source_id in source_ids),
+                                   return_exceptions=True)
+    
+    errors = {}
+    for source_id, result in zip(source_ids, results):
+        if isinstance(result, Exception):
+            logging.error(f"Failed to refresh {source_id} permits: {result}")
+            errors[source_id] = result
+    return errors
+
+async def refresh_source_in_background(source_id: str):
+    """Refresh a source without anyone waiting on it"""
+    try:
+        await refresh_source(source_id, force=False)
+    except Exception as e:
+        logging.error(f"Background refresh of {source_id} permits failed: {e}")
+
+def schedule_source_refresh(source_id: str):
+    """Start a background refresh of a source unless one is already running"""
+    task = source_refresh_tasks.get(source_id)
+    if task is None or task.done():
+        source_refresh_tasks[source_id] = asyncio.create_task(refresh_source_in_background(source_id))
+
 async def get_cached_permits():
     """Get permits from cache or fetch new data"""
-    now = datetime.utcnow()
+    due_sources = [source_id for source_id in PERMIT_SOURCES if source_refresh_delay(source_id) == 0]
+    
+    # With nothing loaded yet there is no snapshot to serve, so wait for the first load
+    if permits_cache["data"] is None:
+        if due_sources:
+            logging.info(f"Fetching initial permit data for {', '.join(due_sources)}")
+            await refresh_sources(due_sources, force=False)
+        if permits_cache["data"] is None:
+            # Every source failed or is backing off after a failure
+            last_error = next((cache["last_error"] for cache in source_caches.values() if cache["last_error"]), None)
+            detail = f"Permit data is not available yet: {last_error}" if last_error else "Permit data is not available yet"
+            raise HTTPException(status_code=503, detail=detail)
+        return permits_cache["data"]
     
     # Check if cache is valid
-    if (permits_cache["data"] is not None and 
-        permits_cache["last_updated"] is not None and 
-        now - permits_cache["last_updated"] < CACHE_DURATION):
+    if not due_sources:
         logging.info("Returning cached permit data")
         return permits_cache["data"]
     
-    # Fetch new data
-    logging.info("Fetching fresh permit data from Calgary API")
-    permits_data = await fetch_calgary_permits()
-    
-    # Update cache
-    permits_cache["data"] = permits_data
-    permits_cache["last_updated"] = now
+    # Otherwise serve the last snapshot and refresh due sources in the background
+    logging.info(f"Refreshing permit data for {', '.join(due_sources)} in the background")
+    for source_id in due_sources:
+        schedule_source_refresh(source_id)
     
-    return permits_data
+    return permits_cache["data"]
 
-def apply_filters(permits: List[dict], filters: PermitFilter) -> List[dict]:
-    """Apply filters to permits data"""
-    filtered_permits = permits.copy()
+def permit_matches(permit: dict, filters: PermitFilter) -> bool:
+    """Check a single permit against the source, type, status, cost, community and work class filters"""
+    if filters.source and permit.get("source") != filters.source:
+        return False
     
-    # Filter by permit type
-    if filters.permit_type:
-        filtered_permits = [p for p in filtered_permits 
-                          if filters.permit_type.lower() in p.get("permittype", "").lower()]
+    if filters.permit_type and filters.permit_type.lower() not in permit.get("permittype", "").lower():
+        return False
     
-    # Filter by status
-    if filters.status:
-        filtered_permits = [p for p in filtered_permits 
-                          if p.get("statuscurrent") == filters.status]
+    if filters.status and permit.get("statuscurrent") != filters.status:
+        return False
     
-    # Filter by cost range
-    if filters.min_cost is not None:
-        filtered_permits = [p for p in filtered_permits 
-                          if float(p.get("estprojectcost", 0) or 0) >= filters.min_cost]
+    if filters.min_cost is not None or filters.max_cost is not None:
+        cost = float(permit.get("estprojectcost", 0) or 0)
+        if filters.min_cost is not None and cost < filters.min_cost:
+            return False
+        if filters.max_cost is not None and cost > filters.max_cost:
+            return False
     
-    if filters.max_cost is not None:
-        filtered_permits = [p for p in filtered_permits 
-                          if float(p.get("estprojectcost", 0) or 0) <= filters.max_cost]
+    if filters.community and filters.community.lower() not in permit.get("communityname", "").lower():
+        return False
     
-    # Filter by community
-    if filters.community:
-        filtered_permits = [p for p in filtered_permits 
-                          if filters.community.lower() in p.get("communityname", "").lower()]
+    if filters.work_class and permit.get("workclass") != filters.work_class:
+        return False
     
-    # Filter by work class
-    if filters.work_class:
-        filtered_permits = [p for p in filtered_permits 
-                          if p.get("workclass") == filters.work_class]
+    return True
+
+def apply_filters(permits: List[dict], filters: PermitFilter, search_index: Optional[dict] = None) -> List[dict]:
+    """Apply filters to permits data"""
+    # Rank by full-text relevance first so the remaining filters keep that order
+    if tokenize(filters.q):
+        if search_index is None or search_index["doc_count"] != len(permits):
+            search_index = build_search_index(permits)
+        filtered_permits = [permits[doc_id] for doc_id in search_permits(filters.q, search_index)]
+    else:
+        filtered_permits = permits.copy()
+    
+    # Filter by permit attributes
+    filtered_permits = [p for p in filtered_permits if permit_matches(p, filters)]
     
     # Filter by date range
     if filters.date_range != 'all':
@@ -185,19 +550,334 @@ def apply_filters(permits: List[dict], filters: PermitFilter) -> List[dict]:
                               if p.get("applieddate") and 
                               datetime.fromisoformat(p["applieddate"].replace('T', ' ').replace('.000', '')) >= cutoff_date]
     
+    # Filter by explicit applied date bounds
+    if filters.date_from or filters.date_to:
+        low = filters.date_from.isoformat() if filters.date_from else ""
+        high = filters.date_to.isoformat() if filters.date_to else "9999-12-31"
+        filtered_permits = [p for p in filtered_permits 
+                          if low <= (p.get("applieddate") or "")[:10] <= high]
+    
     # Apply pagination
     start_idx = filters.offset
     end_idx = start_idx + filters.limit
     
     return filtered_permits[start_idx:end_idx]
 
+def cost_bucket(cost: float) -> int:
+    """Get the cost bucket a project cost falls into"""
+    return bisect_right(COST_BUCKET_BOUNDS, cost)
+
+def index_saved_search(search: dict):
+    """Add a saved search to the in-memory matching index"""
+    search_id = search["id"]
+    saved_search_index["searches"][search_id] = {
+        **search,
+        "filters": PermitFilter(**{k: search.get(k) for k in ["source", "permit_type", "status", "min_cost", "max_cost", "community", "work_class"]}),
+        "terms": set(tokenize(search.get("q")))
+    }
+    
+    saved_search_index["status"].setdefault(search.get("status") or None, set()).add(search_id)
+    saved_search_index["workclass"].setdefault(search.get("work_class") or None, set()).add(search_id)
+    community = (search.get("community") or "").lower() or None
+    saved_search_index["community"].setdefault(community, set()).add(search_id)
+    saved_search_index["community_matches"].clear()
+    
+    low = cost_bucket(search["min_cost"]) if search.get("min_cost") is not None else 0
+    high = cost_bucket(search["max_cost"]) if search.get("max_cost") is not None else len(COST_BUCKET_BOUNDS)
+    for bucket in range(low, high + 1):
+        saved_search_index["cost_buckets"][bucket].add(search_id)
+
+def unindex_saved_search(search_id: str):
+    """Remove a saved search from the in-memory matching index"""
+    if saved_search_index["searches"].pop(search_id, None) is None:
+        return
+    
+    for field in ["status", "workclass", "community"]:
+        for search_ids in saved_search_index[field].values():
+            search_ids.discard(search_id)
+    for search_ids in saved_search_index["cost_buckets"]:
+        search_ids.discard(search_id)
+    saved_search_index["community_matches"].clear()
+
+def community_candidates(communityname: str) -> set:
+    """Get saved searches whose community filter matches a community name"""
+    name = communityname.lower()
+    matches = saved_search_index["community_matches"].get(name)
+    if matches is None:
+        # Only computed once per distinct community until the searches change
+        matches = set()
+        for community, search_ids in saved_search_index["community"].items():
+            if community is not None and community in name:
+                matches |= search_ids
+        saved_search_index["community_matches"][name] = matches
+    return matches
+
+def match_saved_searches(permit: dict) -> List[str]:
+    """Find the saved searches a permit matches"""
+    # Candidate sets per indexed field, a search must appear in every field's set
+    candidate_groups = [
+        [saved_search_index["status"].get(permit.get("statuscurrent"), set()), saved_search_index["status"].get(None, set())],
+        [saved_search_index["workclass"].get(permit.get("workclass"), set()), saved_search_index["workclass"].get(None, set())],
+        [community_candidates(permit.get("communityname", "")), saved_search_index["community"].get(None, set())],
+        [saved_search_index["cost_buckets"][cost_bucket(float(permit.get("estprojectcost", 0) or 0))]]
+    ]
+    
+    # Walk the most selective field and verify the rest exactly
+    candidates = min(candidate_groups, key=lambda group: sum(len(ids) for ids in group))
+    terms = None
+    matched = []
+    for search_ids in candidates:
+        for search_id in search_ids:
+            search = saved_search_index["searches"][search_id]
+            if not permit_matches(permit, search["filters"]):
+                continue
+            if search["terms"]:
+                if terms is None:
+                    terms = permit_terms(permit)
+                if not search["terms"] & terms:
+                    continue
+            matched.append(search_id)
+    
+    return matched
+
+async def emit_saved_search_alerts(changes: dict):
+    """Match a refresh delta against all saved searches and store the alerts"""
+    alerts = []
+    for change in ["added", "status_changed"]:
+        for permit in changes[change]:
+            for search_id in match_saved_searches(permit):
+                search = saved_search_index["searches"][search_id]
+                alerts.append(SearchAlert(search_id=search_id, owner=search.get("owner"), change=change, permit=permit).dict())
+    
+    if not alerts:
+        return
+    
+    try:
+        await db.search_alerts.insert_many(alerts)
+        logging.info(f"Stored {len(alerts)} saved search alerts")
+    except Exception as e:
+        logging.error(f"Failed to store saved search alerts: {e}")
+
+def archive_partition_path(source_id: str, month: str) -> Path:
+    """Get the archive file for a source's YYYY-MM month"""
+    return ARCHIVE_DIR / source_id / f"{month}.parquet"
+
+def archive_partitions(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                       source_id: Optional[str] = None) -> List[Path]:
+    """List archive partitions overlapping a date range, newest first"""
+    if not ARCHIVE_DIR.exists():
+        return []
+    
+    low = date_from.strftime("%Y-%m") if date_from else ""
+    high = date_to.strftime("%Y-%m") if date_to else "9999-12"
+    pattern = f"{source_id}/*.parquet" if source_id else "*/*.parquet"
+    partitions = [path for path in ARCHIVE_DIR.glob(pattern) if low <= path.stem <= high]
+    return sorted(partitions, key=lambda path: path.stem, reverse=True)
+
+def archive_permits(source_id: str, permits: List[dict]):
+    """Merge permits into their monthly archive partitions, newer snapshots win"""
+    by_month = {}
+    for permit in permits:
+        if permit.get("applieddate"):
+            by_month.setdefault(permit["applieddate"][:7], []).append(permit)
+    
+    (ARCHIVE_DIR / source_id).mkdir(parents=True, exist_ok=True)
+    for month, month_permits in by_month.items():
+        path = archive_partition_path(source_id, month)
+        merged = {}
+        if path.exists():
+            for row in pq.read_table(path).to_pylist():
+                merged[row["permitnum"]] = row
+        for permit in month_permits:
+            merged[permit["permitnum"]] = {
+                field: str(permit[field]) if permit.get(field) is not None else None
+                for field in ARCHIVE_FIELDS
+            }
+        
+        rows = sorted(merged.values(), key=lambda row: row["applieddate"] or "", reverse=True)
+        table = pa.Table.from_pylist(rows, schema=ARCHIVE_SCHEMA)
+        
+        # Write then swap so readers never see a partial partition
+        tmp_path = path.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+async def archive_snapshot(source_id: str, permits: List[dict]):
+    """Merge a source snapshot into the archive in a worker thread, one write at a time"""
+    try:
+        async with archive_lock:
+            await asyncio.to_thread(archive_permits, source_id, permits)
+    except Exception as e:
+        logging.error(f"Failed to archive {source_id} permits: {e}")
+
+def iter_archived_permits(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                          source_id: Optional[str] = None):
+    """Stream archived permits in a date range, newest partition first, one batch in memory at a time"""
+    low = date_from.isoformat() if date_from else ""
+    high = date_to.isoformat() if date_to else "9999-12-31"
+    
+    for path in archive_partitions(date_from, date_to, source_id):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=ARCHIVE_BATCH_SIZE):
+            for permit in batch.to_pylist():
+                if low <= (permit["applieddate"] or "")[:10] <= high:
+                    yield permit
+
+def query_archive(filters: PermitFilter) -> dict:
+    """Filter and paginate archived permits without loading the date range into memory"""
+    partitions = archive_partitions(filters.date_from, filters.date_to, filters.source)
+    query_terms = set(tokenize(filters.q))
+    
+    page = []
+    skipped = 0
+    for permit in iter_archived_permits(filters.date_from, filters.date_to, filters.source):
+        if not permit_matches(permit, filters):
+            continue
+        # Archive scans match any query term rather than ranking by BM25
+        if query_terms and not query_terms & permit_terms(permit):
+            continue
+        if skipped < filters.offset:
+            skipped += 1
+            continue
+        page.append(permit)
+        if len(page) >= filters.limit:
+            break
+    
+    return {
+        "permits": page,
+        "total_count": sum(pq.ParquetFile(path).metadata.num_rows for path in partitions),
+        "partitions_scanned": len(partitions)
+    }
+
+async def load_saved_searches():
+    """Load saved searches from MongoDB into the matching index"""
+    searches = await db.saved_searches.find({}, {"_id": 0}).to_list(None)
+    for search in searches:
+        index_saved_search(search)
+    return len(searches)
+
+def validate_source(source: Optional[str]):
+    """Reject unknown permit source ids"""
+    if source and source not in PERMIT_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown source '{source}', expected one of: {', '.join(PERMIT_SOURCES)}")
+
+# Response compression
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Pick the best supported content encoding from an Accept-Encoding header"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+    
+    # Highest quality wins, brotli before gzip on ties
+    candidates = [(accepted.get(encoding, accepted.get("*", 0.0)), -rank, encoding)
+                  for rank, encoding in enumerate(["br", "gzip"])]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else "identity"
+
+def encode_body(body: bytes, encoding: str, cached: bool = False) -> tuple:
+    """Compress a response body, returning the encoded bytes and the encoding actually applied"""
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return body, "identity"
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY), "br"
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, "identity"
+
+def encoded_response(body: bytes, encoding: str) -> Response:
+    """Build a JSON response for an already encoded body"""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def serialize_json(payload: Union[dict, list]) -> bytes:
+    """Serialise a payload the same way FastAPI's JSONResponse does"""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def serialize_and_encode(payload: Union[dict, list], encoding: str) -> tuple:
+    """Serialise and compress a payload in one step, for running off the event loop"""
+    return encode_body(serialize_json(payload), encoding)
+
+def evict_cached_responses():
+    """Drop the least recently used stored responses until they fit the byte budget"""
+    total_size = sum(entry["size"] for entry in response_cache.values())
+    while total_size > RESPONSE_CACHE_MAX_BYTES and response_cache:
+        _, evicted = response_cache.popitem(last=False)
+        total_size -= evicted["size"]
+
+async def respond_from_entry(entry: dict, encoding: str) -> Response:
+    """Serve a stored response, compressing it in a worker thread the first time an encoding is asked for"""
+    if encoding not in entry["bodies"]:
+        encoded = await asyncio.to_thread(encode_body, entry["bodies"]["identity"][0], encoding, True)
+        entry["bodies"][encoding] = encoded
+        entry["size"] += len(encoded[0])
+        evict_cached_responses()
+    
+    return encoded_response(*entry["bodies"][encoding])
+
+async def compressed_json_response(request: Request, payload: Union[dict, list], cache_key: Optional[str] = None,
+                                   version: Optional[datetime] = None) -> Response:
+    """Serialise and compress a payload, storing the bytes when it is derived from a cache snapshot"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    
+    if cache_key is None or version is None:
+        return encoded_response(*await asyncio.to_thread(serialize_and_encode, payload, encoding))
+    
+    body = await asyncio.to_thread(serialize_json, payload)
+    entry = {"version": version, "bodies": {"identity": (body, "identity")}, "size": len(body)}
+    response_cache[cache_key] = entry
+    response_cache.move_to_end(cache_key)
+    evict_cached_responses()
+    
+    return await respond_from_entry(entry, encoding)
+
+async def cached_response(request: Request, cache_key: str, version: Optional[datetime]) -> Optional[Response]:
+    """Serve stored bytes for a snapshot-derived response, compressing each encoding once per version"""
+    entry = response_cache.get(cache_key)
+    if entry is None or version is None or entry["version"] != version:
+        return None
+    
+    response_cache.move_to_end(cache_key)
+    return await respond_from_entry(entry, negotiate_encoding(request.headers.get("accept-encoding")))
+
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "BuildBeacon API - Calgary Building Permits Intelligence"}
 
+@api_router.get("/sources")
+async def get_sources():
+    """List the permit data sources and their cache state"""
+    return {
+        "sources": [
+            {
+                "id": source_id,
+                "name": source["name"],
+                "refresh_interval_seconds": source["refresh_interval"].total_seconds(),
+                "permits_cached": len(source_caches[source_id]["data"]) if source_caches[source_id]["data"] else 0,
+                "cache_updated": source_caches[source_id]["last_updated"].isoformat() if source_caches[source_id]["last_updated"] else None,
+                "last_attempt": source_caches[source_id]["last_attempt"].isoformat() if source_caches[source_id]["last_attempt"] else None,
+                "consecutive_failures": source_caches[source_id]["failures"],
+                "last_error": source_caches[source_id]["last_error"]
+            }
+            for source_id, source in PERMIT_SOURCES.items()
+        ]
+    }
+
 @api_router.get("/permits")
 async def get_permits(
+    request: Request,
+    source: Optional[str] = Query(None, description="Limit to one permit source"),
     permit_type: Optional[str] = Query(None, description="Filter by permit type"),
     status: Optional[str] = Query(None, description="Filter by permit status"),
     min_cost: Optional[float] = Query(None, description="Minimum project cost"),
@@ -206,16 +886,32 @@ async def get_permits(
     date_range: Optional[str] = Query('all', description="Date range filter"),
     work_class: Optional[str] = Query(None, description="Filter by work class"),
     contractor_type: Optional[str] = Query('all', description="Filter by contractor type"),
+    q: Optional[str] = Query(None, description="Full-text search over description, address, applicant and contractor"),
+    date_from: Optional[date] = Query(None, alias="from", description="Earliest applied date (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Latest applied date (YYYY-MM-DD)"),
     limit: Optional[int] = Query(1000, description="Number of permits to return"),
     offset: Optional[int] = Query(0, description="Number of permits to skip")
 ):
     """Get building permits with optional filtering"""
+    validate_source(source)
+    
     try:
-        # Get permits data
-        permits = await get_cached_permits()
+        # Get permits data, from one source or merged across all of them
+        await get_cached_permits()
+        cache = source_caches[source] if source else permits_cache
+        permits = cache["data"] or []
+        
+        # Unfiltered pages are stored encoded until the next refresh, filtered ones are encoded per request
+        cache_key = None
+        if set(request.query_params) <= CACHEABLE_PERMIT_PARAMS:
+            cache_key = "permits?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+            cached = await cached_response(request, cache_key, cache["last_updated"])
+            if cached:
+                return cached
         
         # Create filter object
         filters = PermitFilter(
+            source=source,
             permit_type=permit_type,
             status=status,
             min_cost=min_cost,
@@ -224,38 +920,165 @@ async def get_permits(
             date_range=date_range,
             work_class=work_class,
             contractor_type=contractor_type,
+            q=q,
+            date_from=date_from,
+            date_to=date_to,
             limit=limit,
             offset=offset
         )
         
+        # Date ranges reaching back to the snapshot's oldest day are served from the archive,
+        # since that day is usually only partly in memory
+        oldest_applied = cache["oldest_applied"]
+        if (date_from or date_to) and (date_from is None or oldest_applied is None or date_from.isoformat() <= oldest_applied):
+            archived = await asyncio.to_thread(query_archive, filters)
+            return await compressed_json_response(request, {
+                "permits": archived["permits"],
+                "total_count": archived["total_count"],
+                "filtered_count": len(archived["permits"]),
+                "limit": limit,
+                "offset": offset,
+                "partitions_scanned": archived["partitions_scanned"],
+                "cache_updated": cache["last_updated"].isoformat() if cache["last_updated"] else None,
+                "api_source": "BuildBeacon - Calgary Building Permits Archive"
+            })
+        
         # Apply filters
-        filtered_permits = apply_filters(permits, filters)
+        filtered_permits = apply_filters(permits, filters, cache["search_index"])
         
-        return {
+        return await compressed_json_response(request, {
             "permits": filtered_permits,
             "total_count": len(permits),
             "filtered_count": len(filtered_permits),
             "limit": limit,
             "offset": offset,
-            "cache_updated": permits_cache["last_updated"].isoformat() if permits_cache["last_updated"] else None,
+            "cache_updated": cache["last_updated"].isoformat() if cache["last_updated"] else None,
             "api_source": "BuildBeacon - Calgary Building Permits"
-        }
+        }, cache_key, cache["last_updated"])
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in get_permits: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def lookup_permit(permit_number: str, source: Optional[str] = None) -> List[dict]:
+    """Find a permit number in one source or in every source, since numbers can repeat across sources"""
+    matches = []
+    for source_id in [source] if source else PERMIT_SOURCES:
+        permit = (source_caches[source_id]["permit_index"] or {}).get(permit_number)
+        if permit:
+            matches.append(permit)
+    return matches
+
+@api_router.post("/permits/batch")
+async def get_permits_batch(request: Request, batch: PermitBatchRequest):
+    """Get many permits by permit number in a single request"""
+    if len(batch.permit_numbers) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} permit numbers per batch")
+    validate_source(batch.source)
+    
+    try:
+        await get_cached_permits()
+        
+        permit_numbers = list(dict.fromkeys(batch.permit_numbers))
+        found = []
+        missing = []
+        ambiguous = []
+        for permit_number in permit_numbers:
+            matches = lookup_permit(permit_number, batch.source)
+            if not matches:
+                missing.append(permit_number)
+            elif len(matches) > 1:
+                # Every match is returned, the caller can pass a source to narrow it down
+                ambiguous.append(permit_number)
+            found.extend(matches)
+        
+        return await compressed_json_response(request, {
+            "permits": found,
+            "missing": missing,
+            "ambiguous": ambiguous,
+            "requested_count": len(permit_numbers),
+            "found_count": len(found),
+            "cache_updated": permits_cache["last_updated"].isoformat() if permits_cache["last_updated"] else None
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error in get_permits_batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/permits/stream")
+async def stream_permit_updates(
+    request: Request,
+    source: Optional[str] = Query(None, description="Limit to one permit source"),
+    permit_type: Optional[str] = Query(None, description="Filter by permit type"),
+    status: Optional[str] = Query(None, description="Filter by permit status"),
+    min_cost: Optional[float] = Query(None, description="Minimum project cost"),
+    max_cost: Optional[float] = Query(None, description="Maximum project cost"),
+    community: Optional[str] = Query(None, description="Filter by community name"),
+    work_class: Optional[str] = Query(None, description="Filter by work class"),
+    q: Optional[str] = Query(None, description="Full-text search over description, address, applicant and contractor")
+):
+    """Stream new, status-changed and no longer matching permits after each cache refresh as Server-Sent Events"""
+    validate_source(source)
+    
+    subscriber = {
+        "queue": asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE),
+        "filters": PermitFilter(
+            source=source,
+            permit_type=permit_type,
+            status=status,
+            min_cost=min_cost,
+            max_cost=max_cost,
+            community=community,
+            work_class=work_class,
+            q=q
+        ),
+        "terms": set(tokenize(q)),
+        "filter_key": (source, permit_type, status, min_cost, max_cost, community, work_class, frozenset(tokenize(q)))
+    }
+    
+    async def event_stream():
+        permit_subscribers.append(subscriber)
+        try:
+            yield "retry: 10000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber["queue"].get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: permits\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            permit_subscribers.remove(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/permits/{permit_number}")
-async def get_permit_by_number(permit_number: str):
+async def get_permit_by_number(
+    permit_number: str,
+    source: Optional[str] = Query(None, description="Permit source, needed when the number exists in several sources")
+):
     """Get a specific permit by permit number"""
+    validate_source(source)
+    
     try:
-        permits = await get_cached_permits()
-        permit = next((p for p in permits if p.get("permitnum") == permit_number), None)
+        await get_cached_permits()
+        matches = lookup_permit(permit_number, source)
         
-        if not permit:
+        if not matches:
             raise HTTPException(status_code=404, detail="Permit not found")
+        if len(matches) > 1:
+            sources = ", ".join(p["source"] for p in matches)
+            raise HTTPException(status_code=409, detail=f"Permit number exists in several sources ({sources}), pass source")
         
-        return permit
+        return matches[0]
         
     except HTTPException:
         raise
@@ -264,11 +1087,15 @@ async def get_permit_by_number(permit_number: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/analytics/communities")
-async def get_community_analytics():
+async def get_community_analytics(request: Request):
     """Get analytics data for Calgary communities"""
     try:
         permits = await get_cached_permits()
         
+        cached = await cached_response(request, "analytics/communities", permits_cache["last_updated"])
+        if cached:
+            return cached
+        
         # Calculate community stats
         community_stats = {}
         for permit in permits:
@@ -306,22 +1133,28 @@ async def get_community_analytics():
         # Sort by total value
         result.sort(key=lambda x: x["total_value"], reverse=True)
         
-        return {
+        return await compressed_json_response(request, {
             "communities": result[:25],  # Top 25 communities
             "total_communities": len(result),
             "data_source": "BuildBeacon Analytics"
-        }
+        }, "analytics/communities", permits_cache["last_updated"])
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in get_community_analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/analytics/contractors")
-async def get_contractor_analytics():
+async def get_contractor_analytics(request: Request):
     """Get analytics data for contractors"""
     try:
         permits = await get_cached_permits()
         
+        cached = await cached_response(request, "analytics/contractors", permits_cache["last_updated"])
+        if cached:
+            return cached
+        
         # Calculate contractor stats
         contractor_stats = {}
         for permit in permits:
@@ -355,29 +1188,75 @@ async def get_contractor_analytics():
         # Sort by total value
         result.sort(key=lambda x: x["total_value"], reverse=True)
         
-        return {
+        return await compressed_json_response(request, {
             "contractors": result[:25],  # Top 25 contractors
             "total_contractors": len(result),
             "data_source": "BuildBeacon Analytics"
-        }
+        }, "analytics/contractors", permits_cache["last_updated"])
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in get_contractor_analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def summarize_archive_by_month(date_from: Optional[date], date_to: Optional[date],
+                               source_id: Optional[str] = None) -> List[dict]:
+    """Aggregate archived permits per applied month while streaming the partitions"""
+    months = {}
+    for permit in iter_archived_permits(date_from, date_to, source_id):
+        month = permit["applieddate"][:7]
+        if month not in months:
+            months[month] = {"month": month, "count": 0, "total_value": 0, "new_projects": 0}
+        
+        months[month]["count"] += 1
+        months[month]["total_value"] += float(permit.get("estprojectcost", 0) or 0)
+        if permit.get("workclass") == "New":
+            months[month]["new_projects"] += 1
+    
+    return sorted(months.values(), key=lambda x: x["month"])
+
+@api_router.get("/analytics/history")
+async def get_history_analytics(
+    request: Request,
+    source: Optional[str] = Query(None, description="Limit to one permit source"),
+    date_from: Optional[date] = Query(None, alias="from", description="Earliest applied date (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Latest applied date (YYYY-MM-DD)")
+):
+    """Get monthly permit volume and value from the historical archive"""
+    validate_source(source)
+    
+    try:
+        months = await asyncio.to_thread(summarize_archive_by_month, date_from, date_to, source)
+        
+        return await compressed_json_response(request, {
+            "months": months,
+            "total_permits": sum(m["count"] for m in months),
+            "total_value": sum(m["total_value"] for m in months),
+            "data_source": "BuildBeacon Archive"
+        })
+        
+    except Exception as e:
+        logging.error(f"Error in get_history_analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/cache/refresh")
-async def refresh_cache():
+async def refresh_cache(source: Optional[str] = Query(None, description="Refresh only this permit source")):
     """Manually refresh the permits cache"""
+    validate_source(source)
+    
     try:
-        permits_data = await fetch_calgary_permits()
-        permits_cache["data"] = permits_data
-        permits_cache["last_updated"] = datetime.utcnow()
+        source_ids = [source] if source else list(PERMIT_SOURCES)
+        errors = await refresh_sources(source_ids)
+        if len(errors) == len(source_ids):
+            raise next(iter(errors.values()))
         
         return {
             "message": "BuildBeacon cache refreshed successfully",
-            "permits_count": len(permits_data),
+            "permits_count": len(permits_cache["data"]),
             "updated_at": permits_cache["last_updated"].isoformat(),
-            "source": "Calgary Open Data API"
+            "source": ", ".join(PERMIT_SOURCES[source_id]["name"] for source_id in source_ids if source_id not in errors),
+            "failed_sources": {source_id: str(error) for source_id, error in errors.items()}
         }
         
     except Exception as e:
@@ -402,15 +1281,21 @@ async def health_check():
         "cache_status": "loaded" if permits_cache["data"] else "empty",
         "cache_updated": permits_cache["last_updated"].isoformat() if permits_cache["last_updated"] else None,
         "permits_cached": len(permits_cache["data"]) if permits_cache["data"] else 0,
+        "sources": {source_id: "loaded" if cache["data"] else "empty" for source_id, cache in source_caches.items()},
+        "stream_subscribers": len(permit_subscribers),
         "timestamp": datetime.utcnow().isoformat()
     }
 
 @api_router.get("/stats/summary")
-async def get_summary_stats():
+async def get_summary_stats(request: Request):
     """Get summary statistics for BuildBeacon dashboard"""
     try:
         permits = await get_cached_permits()
         
+        cached = await cached_response(request, "stats/summary", permits_cache["last_updated"])
+        if cached:
+            return cached
+        
         total_permits = len(permits)
         total_value = sum(float(p.get("estprojectcost", 0) or 0) for p in permits)
         active_permits = len([p for p in permits if p.get("statuscurrent") in ["Pre Backfill Phase", "Issued Permit"]])
@@ -429,7 +1314,7 @@ async def get_summary_stats():
                 except:
                     continue
         
-        return {
+        return await compressed_json_response(request, {
             "total_permits": total_permits,
             "total_value": total_value,
             "active_permits": active_permits,
@@ -438,24 +1323,151 @@ async def get_summary_stats():
             "unique_contractors": unique_contractors,
             "avg_project_value": total_value / total_permits if total_permits > 0 else 0,
             "cache_updated": permits_cache["last_updated"].isoformat() if permits_cache["last_updated"] else None
-        }
+        }, "stats/summary", permits_cache["last_updated"])
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in get_summary_stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Saved searches and alerts
+@api_router.post("/saved-searches", response_model=SavedSearch)
+async def create_saved_search(input: SavedSearchCreate):
+    """Save a search to be alerted on new and changed permits"""
+    validate_source(input.source)
+    search_obj = SavedSearch(**input.dict())
+    await db.saved_searches.insert_one(search_obj.dict())
+    index_saved_search(search_obj.dict())
+    return search_obj
+
+@api_router.get("/saved-searches", response_model=List[SavedSearch])
+async def get_saved_searches(owner: Optional[str] = Query(None, description="Filter by owner")):
+    """List saved searches"""
+    query = {"owner": owner} if owner else {}
+    searches = await db.saved_searches.find(query, {"_id": 0}).to_list(None)
+    return [SavedSearch(**search) for search in searches]
+
+@api_router.delete("/saved-searches/{search_id}")
+async def delete_saved_search(search_id: str):
+    """Delete a saved search along with its alerts and stop alerting on it"""
+    result = await db.saved_searches.delete_one({"id": search_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    
+    unindex_saved_search(search_id)
+    await db.search_alerts.delete_many({"search_id": search_id})
+    return {"message": "Saved search deleted", "id": search_id}
+
+@api_router.get("/saved-searches/{search_id}/alerts", response_model=List[SearchAlert])
+async def get_saved_search_alerts(
+    search_id: str,
+    limit: int = Query(100, ge=1, le=MAX_ALERTS_PER_REQUEST, description="Number of alerts to return")
+):
+    """Get the most recent alerts for a saved search"""
+    alerts = await db.search_alerts.find({"search_id": search_id}, {"_id": 0}).sort("created_at", -1).to_list(limit)
+    return [SearchAlert(**alert) for alert in alerts]
+
+# Status check storage
+async def flush_status_checks() -> bool:
+    """Write buffered status checks to MongoDB in a single insert_many, returning whether it succeeded"""
+    async with status_flush_lock:
+        if not status_check_buffer:
+            return True
+        
+        batch = status_check_buffer[:]
+        del status_check_buffer[:len(batch)]
+        
+        # The status check id doubles as _id, so re-sending a check that was
+        # already written fails with a duplicate key instead of storing it twice
+        documents = [{**status_check, "_id": status_check["id"]} for status_check in batch]
+        try:
+            await db.status_checks.insert_many(documents, ordered=False)
+            return True
+        except BulkWriteError as e:
+            # Everything outside writeErrors was written, duplicates are already stored
+            retry = [batch[error["index"]] for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+            if not retry:
+                return True
+            logging.error(f"Failed to write {len(retry)} of {len(batch)} status checks: {e}")
+        except Exception as e:
+            # Unknown how much was written, retrying is safe since duplicates are rejected
+            retry = batch
+            logging.error(f"Failed to flush {len(batch)} status checks: {e}")
+        
+        # Keep them for the next flush, dropping the oldest past the buffer cap
+        status_check_buffer[:0] = retry
+        del status_check_buffer[:max(0, len(status_check_buffer) - STATUS_MAX_BUFFER)]
+        return False
+
+async def flush_status_checks_periodically():
+    """Flush buffered status checks on an interval or when the buffer fills, backing off while MongoDB fails"""
+    backoff = STATUS_FLUSH_INTERVAL
+    while True:
+        try:
+            await asyncio.wait_for(status_flush_requested.wait(), timeout=STATUS_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        status_flush_requested.clear()
+        
+        if await flush_status_checks():
+            backoff = STATUS_FLUSH_INTERVAL
+        else:
+            # Early flush requests are ignored until the backoff has elapsed
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, STATUS_FLUSH_MAX_BACKOFF)
+
+def encode_status_cursor(status_check: dict) -> str:
+    """Build the cursor pointing just past a status check"""
+    return f"{status_check['timestamp'].isoformat()}_{status_check['id']}"
+
+def decode_status_cursor(cursor: str) -> dict:
+    """Build the query for status checks older than a cursor"""
+    try:
+        timestamp, _, status_id = cursor.rpartition("_")
+        timestamp = datetime.fromisoformat(timestamp)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": status_id}}
+    ]}
+
 # Legacy routes for compatibility
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    
+    # Written behind in batches, the background flusher runs early once the buffer fills up
+    status_check_buffer.append(status_obj.dict())
+    if len(status_check_buffer) >= STATUS_FLUSH_SIZE:
+        status_flush_requested.set()
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    request: Request,
+    limit: int = Query(STATUS_PAGE_SIZE, ge=1, le=STATUS_MAX_PAGE_SIZE, description="Number of status checks to return"),
+    cursor: Optional[str] = Query(None, description="Return status checks older than this cursor")
+):
+    """Get status checks, newest first, a page at a time; the next cursor is sent in X-Next-Cursor"""
+    query = decode_status_cursor(cursor) if cursor else {}
+    
+    # Make buffered writes visible to readers
+    await flush_status_checks()
+    
+    status_checks = await db.status_checks.find(
+        query, {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+    ).sort([("timestamp", -1), ("id", -1)]).limit(limit).to_list(limit)
+    
+    response = await compressed_json_response(request, [
+        {**status_check, "timestamp": status_check["timestamp"].isoformat()} for status_check in status_checks
+    ])
+    if len(status_checks) == limit:
+        response.headers["X-Next-Cursor"] = encode_status_cursor(status_checks[-1])
+    return response
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -467,6 +1479,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -476,18 +1489,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def refresh_source_periodically(source_id: str):
+    """Refresh a source's cache on its own schedule so stream subscribers get updates"""
+    while True:
+        await asyncio.sleep(max(source_refresh_delay(source_id), 1))
+        try:
+            await refresh_source(source_id, force=False)
+            logger.info(f"Scheduled {source_id} permits cache refresh complete")
+        except Exception as e:
+            logger.error(f"Scheduled {source_id} permits cache refresh failed: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize BuildBeacon API"""
     logger.info("Starting BuildBeacon API - Calgary Building Permits Intelligence")
+    
     # Pre-load permits cache on startup
     try:
         await get_cached_permits()
         logger.info("Successfully pre-loaded BuildBeacon permits cache")
     except Exception as e:
         logger.error(f"Failed to pre-load BuildBeacon permits cache: {e}")
+    
+    # Load saved searches into the alert matching index, expiring alerts after the retention period
+    try:
+        await db.search_alerts.create_index([("search_id", 1), ("created_at", -1)])
+        await db.search_alerts.create_index("created_at", expireAfterSeconds=int(SEARCH_ALERT_RETENTION.total_seconds()))
+        search_count = await load_saved_searches()
+        logger.info(f"Loaded {search_count} saved searches")
+    except Exception as e:
+        logger.error(f"Failed to load saved searches: {e}")
+    
+    # Index status checks for time-ordered pagination and expire them after the retention period
+    try:
+        await db.status_checks.create_index([("timestamp", -1), ("id", -1)])
+        await db.status_checks.create_index("timestamp", expireAfterSeconds=int(STATUS_CHECK_RETENTION.total_seconds()))
+    except Exception as e:
+        logger.error(f"Failed to create status check indexes: {e}")
+    
+    app.state.refresh_tasks = [
+        asyncio.create_task(refresh_source_periodically(source_id)) for source_id in PERMIT_SOURCES
+    ]
+    app.state.status_flush_task = asyncio.create_task(flush_status_checks_periodically())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in app.state.refresh_tasks:
+        task.cancel()
+    app.state.status_flush_task.cancel()
+    await flush_status_checks()
+    await asyncio.gather(*archive_tasks, return_exceptions=True)
     client.close()
     logger.info("BuildBeacon API shutdown complete")
\ No newline at end of file
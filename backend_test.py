@@ -36,6 +36,30 @@ def test_health_check():
         print(f"❌ Health Check Failed: {str(e)}")
         return False, None
 
+def test_sources():
+    """Test the /api/sources endpoint"""
+    print("\n🔍 Testing Sources Endpoint...")
+    
+    try:
+        response = requests.get(f"{API_BASE_URL}/sources")
+        response.raise_for_status()
+        data = response.json()
+        
+        print(f"✅ Status Code: {response.status_code}")
+        for source in data.get("sources", []):
+            print(f"✅ Source: {source.get('id')} ({source.get('name')}) - {source.get('permits_cached')} permits cached")
+        
+        invalid_response = requests.get(f"{API_BASE_URL}/permits", params={"source": "INVALID"})
+        if invalid_response.status_code == 400:
+            print(f"✅ Invalid Source Handling: 400 Bad Request")
+        else:
+            print(f"❌ Invalid Source Handling: Expected 400, got {invalid_response.status_code}")
+        
+        return True, data
+    except Exception as e:
+        print(f"❌ Sources Test Failed: {str(e)}")
+        return False, None
+
 def test_permits_endpoint():
     """Test the /api/permits endpoint with various filters"""
     print("\n🔍 Testing Permits Endpoint...")
@@ -49,7 +73,12 @@ def test_permits_endpoint():
         {"name": "Date range filter", "params": {"date_range": "30days", "limit": 100}, "expected_min_count": 1},
         {"name": "Work class filter", "params": {"work_class": "New", "limit": 100}, "expected_min_count": 1},
         {"name": "Pagination", "params": {"limit": 10, "offset": 5}, "expected_min_count": 1},
-        {"name": "Combined filters", "params": {"community": "DOWNTOWN", "min_cost": 100000, "limit": 100}, "expected_min_count": 0}
+        {"name": "Combined filters", "params": {"community": "DOWNTOWN", "min_cost": 100000, "limit": 100}, "expected_min_count": 0},
+        {"name": "Full-text search", "params": {"q": "basement", "limit": 100}, "expected_min_count": 1},
+        {"name": "Search with filters", "params": {"q": "secondary suite", "status": "Issued Permit", "limit": 100}, "expected_min_count": 0},
+        {"name": "Search without terms", "params": {"q": "!!!", "limit": 100}, "expected_min_count": 1},
+        {"name": "Explicit date range", "params": {"from": "2023-01-01", "to": "2023-12-31", "limit": 100}, "expected_min_count": 0},
+        {"name": "Single source", "params": {"source": "calgary", "limit": 100}, "expected_min_count": 1}
     ]
     
     results = []
@@ -186,13 +215,66 @@ def test_individual_permit(permit_number=None):
         print(f"❌ Individual Permit Test Failed: {str(e)}")
         return False, None
 
+def test_permits_batch(permit_number=None):
+    """Test the /api/permits/batch endpoint"""
+    print("\n🔍 Testing Batch Permit Lookup Endpoint...")
+    
+    invalid_permit = "INVALID123456"
+    permit_numbers = [permit_number, invalid_permit] if permit_number else [invalid_permit]
+    
+    try:
+        response = requests.post(f"{API_BASE_URL}/permits/batch", json={"permit_numbers": permit_numbers})
+        response.raise_for_status()
+        data = response.json()
+        
+        print(f"✅ Status Code: {response.status_code}")
+        print(f"✅ Found Count: {data.get('found_count')}")
+        print(f"✅ Missing: {data.get('missing')}")
+        
+        if invalid_permit not in data.get("missing", []):
+            print(f"❌ Missing permit not reported: {invalid_permit}")
+            return False, data
+        
+        if permit_number and not any(p.get("permitnum") == permit_number for p in data.get("permits", [])):
+            print(f"❌ Permit not returned: {permit_number}")
+            return False, data
+        
+        return True, data
+    except Exception as e:
+        print(f"❌ Batch Permit Test Failed: {str(e)}")
+        return False, None
+
+def test_permits_stream():
+    """Test the /api/permits/stream Server-Sent Events endpoint"""
+    print("\n🔍 Testing Permit Updates Stream Endpoint...")
+    
+    try:
+        with requests.get(f"{API_BASE_URL}/permits/stream", params={"status": "Issued Permit"}, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            first_line = next(response.iter_lines(decode_unicode=True))
+        
+        print(f"✅ Status Code: {response.status_code}")
+        print(f"✅ Content Type: {content_type}")
+        print(f"✅ First Line: {first_line}")
+        
+        if not content_type.startswith("text/event-stream"):
+            print(f"❌ Expected text/event-stream, got {content_type}")
+            return False, None
+        
+        return True, {"content_type": content_type}
+    except Exception as e:
+        print(f"❌ Permit Stream Test Failed: {str(e)}")
+        return False, None
+
 def test_analytics_endpoints():
     """Test the analytics endpoints"""
     print("\n🔍 Testing Analytics Endpoints...")
     
     endpoints = [
         {"name": "Communities Analytics", "url": f"{API_BASE_URL}/analytics/communities"},
-        {"name": "Contractors Analytics", "url": f"{API_BASE_URL}/analytics/contractors"}
+        {"name": "Contractors Analytics", "url": f"{API_BASE_URL}/analytics/contractors"},
+        {"name": "History Analytics", "url": f"{API_BASE_URL}/analytics/history"}
     ]
     
     results = []
@@ -225,6 +307,10 @@ def test_analytics_endpoints():
                     top_contractor = data['contractors'][0]
                     print(f"✅ Top Contractor: {top_contractor.get('name')} (Count: {top_contractor.get('count')}, Value: ${top_contractor.get('total_value', 0):,.2f})")
             
+            if "months" in data:
+                print(f"✅ Archived Months: {len(data['months'])}")
+                print(f"✅ Archived Permits: {data.get('total_permits', 'N/A')}")
+            
             print(f"✅ Response Time: {response_time:.2f} seconds")
             
             results.append({
@@ -293,6 +379,110 @@ def test_summary_stats():
         print(f"❌ Summary Stats Test Failed: {str(e)}")
         return False, None
 
+def test_saved_searches():
+    """Test the /api/saved-searches endpoints"""
+    print("\n🔍 Testing Saved Search Endpoints...")
+    
+    try:
+        payload = {"name": "Residential over $500k", "status": "Issued Permit", "min_cost": 500000, "community": "DOWNTOWN"}
+        response = requests.post(f"{API_BASE_URL}/saved-searches", json=payload)
+        response.raise_for_status()
+        search = response.json()
+        
+        print(f"✅ Status Code: {response.status_code}")
+        print(f"✅ Saved Search ID: {search.get('id')}")
+        
+        response = requests.get(f"{API_BASE_URL}/saved-searches")
+        response.raise_for_status()
+        print(f"✅ Saved Searches Count: {len(response.json())}")
+        
+        response = requests.get(f"{API_BASE_URL}/saved-searches/{search['id']}/alerts")
+        response.raise_for_status()
+        print(f"✅ Alerts Count: {len(response.json())}")
+        
+        response = requests.delete(f"{API_BASE_URL}/saved-searches/{search['id']}")
+        response.raise_for_status()
+        print(f"✅ Deleted Saved Search: {search['id']}")
+        
+        response = requests.get(f"{API_BASE_URL}/saved-searches/{search['id']}/alerts")
+        response.raise_for_status()
+        if response.json():
+            print(f"❌ Alerts Left After Delete: {len(response.json())}")
+            return False, None
+        print(f"✅ Alerts Removed With Saved Search")
+        
+        missing_response = requests.delete(f"{API_BASE_URL}/saved-searches/{search['id']}")
+        if missing_response.status_code == 404:
+            print(f"✅ Missing Saved Search Handling: 404 Not Found")
+        else:
+            print(f"❌ Missing Saved Search Handling: Expected 404, got {missing_response.status_code}")
+        
+        return True, search
+    except Exception as e:
+        print(f"❌ Saved Search Test Failed: {str(e)}")
+        return False, None
+
+def test_compression():
+    """Test gzip and brotli content negotiation on snapshot-derived endpoints"""
+    print("\n🔍 Testing Response Compression...")
+    
+    endpoints = [f"{API_BASE_URL}/permits", f"{API_BASE_URL}/analytics/communities"]
+    
+    try:
+        for url in endpoints:
+            for encoding in ["gzip", "br"]:
+                response = requests.get(url, headers={"Accept-Encoding": encoding}, stream=True)
+                response.raise_for_status()
+                content_encoding = response.headers.get("content-encoding")
+                compressed_size = len(response.raw.read())
+                
+                print(f"✅ {url.replace(API_BASE_URL, '')} [{encoding}]: Content-Encoding {content_encoding}, {compressed_size} bytes")
+                if content_encoding != encoding:
+                    print(f"❌ Expected Content-Encoding {encoding}, got {content_encoding}")
+                    return False, None
+        
+        return True, None
+    except Exception as e:
+        print(f"❌ Compression Test Failed: {str(e)}")
+        return False, None
+
+def test_status_checks():
+    """Test the /api/status endpoints with cursor pagination"""
+    print("\n🔍 Testing Status Check Endpoints...")
+    
+    try:
+        for i in range(3):
+            response = requests.post(f"{API_BASE_URL}/status", json={"client_name": f"backend_test_{i}"})
+            response.raise_for_status()
+        print(f"✅ Created Status Checks: 3")
+        
+        response = requests.get(f"{API_BASE_URL}/status", params={"limit": 2})
+        response.raise_for_status()
+        first_page = response.json()
+        next_cursor = response.headers.get("x-next-cursor")
+        
+        print(f"✅ Status Code: {response.status_code}")
+        print(f"✅ First Page Count: {len(first_page)}")
+        print(f"✅ Next Cursor: {next_cursor}")
+        
+        if not next_cursor:
+            print(f"❌ Missing X-Next-Cursor header on a full page")
+            return False, None
+        
+        response = requests.get(f"{API_BASE_URL}/status", params={"limit": 2, "cursor": next_cursor})
+        response.raise_for_status()
+        second_page = response.json()
+        print(f"✅ Second Page Count: {len(second_page)}")
+        
+        if {s["id"] for s in first_page} & {s["id"] for s in second_page}:
+            print(f"❌ Pages overlap")
+            return False, None
+        
+        return True, {"first_page": first_page, "second_page": second_page}
+    except Exception as e:
+        print(f"❌ Status Check Test Failed: {str(e)}")
+        return False, None
+
 def run_all_tests():
     """Run all API tests"""
     print_separator()
@@ -307,6 +497,11 @@ def run_all_tests():
     test_results["health_check"] = {"success": health_success, "data": health_data}
     print_separator()
     
+    # Test sources
+    sources_success, sources_data = test_sources()
+    test_results["sources"] = {"success": sources_success, "data": sources_data}
+    print_separator()
+    
     # Test permits endpoint
     permits_success, permits_data = test_permits_endpoint()
     test_results["permits"] = {"success": permits_success, "data": permits_data}
@@ -318,6 +513,16 @@ def run_all_tests():
     test_results["individual_permit"] = {"success": individual_permit_success, "data": individual_permit_data}
     print_separator()
     
+    # Test batch permit lookup
+    batch_success, batch_data = test_permits_batch(sample_permit_number)
+    test_results["permits_batch"] = {"success": batch_success, "data": batch_data}
+    print_separator()
+    
+    # Test permit updates stream
+    stream_success, stream_data = test_permits_stream()
+    test_results["permits_stream"] = {"success": stream_success, "data": stream_data}
+    print_separator()
+    
     # Test analytics endpoints
     analytics_success, analytics_data = test_analytics_endpoints()
     test_results["analytics"] = {"success": analytics_success, "data": analytics_data}
@@ -333,6 +538,21 @@ def run_all_tests():
     test_results["summary_stats"] = {"success": stats_success, "data": stats_data}
     print_separator()
     
+    # Test response compression
+    compression_success, compression_data = test_compression()
+    test_results["compression"] = {"success": compression_success, "data": compression_data}
+    print_separator()
+    
+    # Test status checks
+    status_success, status_data = test_status_checks()
+    test_results["status_checks"] = {"success": status_success, "data": status_data}
+    print_separator()
+    
+    # Test saved searches
+    saved_search_success, saved_search_data = test_saved_searches()
+    test_results["saved_searches"] = {"success": saved_search_success, "data": saved_search_data}
+    print_separator()
+    
     # Print summary
     print("\n📊 TEST SUMMARY")
     print("--------------")
@@ -43,22 +43,30 @@ export const LeadsProvider = ({ children }) => {
     }
   }, []);
 
+  // Build query params for the filters the backend supports everywhere
+  const buildFilterParams = () => {
+    const params = new URLSearchParams();
+    
+    if (filters.permitType) params.append('permit_type', filters.permitType);
+    if (filters.status) params.append('status', filters.status);
+    if (filters.minCost) params.append('min_cost', filters.minCost);
+    if (filters.maxCost) params.append('max_cost', filters.maxCost);
+    if (filters.community) params.append('community', filters.community);
+    if (filters.workClass) params.append('work_class', filters.workClass);
+    
+    return params;
+  };
+
   // Fetch permits from backend
   const fetchPermits = async (forceRefresh = false) => {
     try {
       setLoading(true);
       setError(null);
 
-      const params = new URLSearchParams();
+      const params = buildFilterParams();
       
       // Add filters to request
-      if (filters.permitType) params.append('permit_type', filters.permitType);
-      if (filters.status) params.append('status', filters.status);
-      if (filters.minCost) params.append('min_cost', filters.minCost);
-      if (filters.maxCost) params.append('max_cost', filters.maxCost);
-      if (filters.community) params.append('community', filters.community);
       if (filters.dateRange && filters.dateRange !== 'all') params.append('date_range', filters.dateRange);
-      if (filters.workClass) params.append('work_class', filters.workClass);
       if (filters.contractorType && filters.contractorType !== 'all') params.append('contractor_type', filters.contractorType);
       
       // Set a reasonable limit
@@ -96,6 +104,32 @@ export const LeadsProvider = ({ children }) => {
     fetchPermits();
   }, []);
 
+  // Merge new and status-changed permits pushed after each backend cache refresh, dropping ones that no longer match
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+
+    const params = buildFilterParams();
+    const source = new EventSource(`${API}/permits/stream${params.toString() ? `?${params.toString()}` : ''}`);
+
+    source.addEventListener('permits', (event) => {
+      const { added = [], status_changed = [], removed = [] } = JSON.parse(event.data);
+      const changed = new Map(status_changed.map(permit => [permit.permitnum, permit]));
+      const dropped = new Set(removed);
+
+      setPermits(prev => {
+        const known = new Set(prev.map(permit => permit.permitnum));
+        const updated = prev
+          .filter(permit => !dropped.has(permit.permitnum))
+          .map(permit => changed.get(permit.permitnum) || permit);
+        return [...added.filter(permit => !known.has(permit.permitnum)), ...updated];
+      });
+
+      console.log(`Received ${added.length} new, ${status_changed.length} updated and ${removed.length} removed permits`);
+    });
+
+    return () => source.close();
+  }, [filters]);
+
   const saveToLocalStorage = (key, data) => {
     localStorage.setItem(key, JSON.stringify(data));
   };